@@ -9,6 +9,11 @@ sodass die Ausgabe von parameter_analysis.py vorhersagbar und prüfbar ist.
 Verwendung:
   python generate_test_data.py                        # erzeugt reports/fake/
   python generate_test_data.py --out reports/myfake   # eigenes Verzeichnis
+  python generate_test_data.py --pretty               # eingerücktes JSON (lesbar)
+  python generate_test_data.py --jsonl                # alle Läufe in ragcheck_runs.jsonl
+  python generate_test_data.py --jobs 4               # Läufe in 4 Prozessen schreiben
+  python generate_test_data.py --force                # auch aktuelle Ausgabe neu schreiben
+  python generate_test_data.py --quiet                # ohne Lauf-Tabelle/erwartete Ergebnisse
 
 Nach der Generierung einfach ausführen:
   python parameter_analysis.py --reports reports/fake
@@ -19,10 +24,21 @@ und werden beim Ausführen auch auf der Konsole ausgegeben.
 
 import json
 import argparse
+import hashlib
 import random
-import math
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
+from types import MappingProxyType
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional: schnellere Serialisierung, sonst stdlib json
+    orjson = None
 
 # ─────────────────────────────────────────────────────────────
 # BEKANNTE PARAMETEREFFEKTE (Ground Truth)
@@ -47,36 +63,46 @@ from pathlib import Path
 
 BASE = 0.45
 
-MODE_BONUS = {
+MODE_BONUS = MappingProxyType({
     "hybrid": 0.25,   # bester Modus
     "local":  0.05,   # mittelmäßig
     "global": 0.00,   # schlechtester Modus
-}
+})
 
-CHUNK_BONUS = {
+CHUNK_BONUS = MappingProxyType({
     256:  -0.10,  # zu klein → schlechter Kontext
     512:  +0.15,  # optimal
     1024: -0.05,  # zu groß → Rauschen nimmt zu
-}
+})
 
-RERANK_BONUS = {
+RERANK_BONUS = MappingProxyType({
     0.1: -0.05,  # zu niedrig → zu viel Rauschen durch
     0.3: +0.08,  # optimal
     0.5: -0.03,  # zu streng → relevante Docs gefiltert
-}
+})
 
-TOPK_BONUS = {
+TOPK_BONUS = MappingProxyType({
     5:  -0.02,  # zu wenig Kandidaten
     10: +0.03,  # gut
     15: +0.04,  # leicht besser
     20:  0.00,  # zu viele → kein Gewinn mehr
-}
+})
+
+# Schreibpuffer für die JSON-Ausgabe ohne os.writev: ein 64-KB-Puffer fasst
+# einen Report in wenige write()-Syscalls.
+WRITE_BUFFER_SIZE = 64 * 1024
+
+# Stempeldatei im Ausgabeverzeichnis: erlaubt das Überspringen unveränderter Läufe
+STAMP_FILE = ".stamp"
+
+# Alle Läufe in einer Datei (eine Zeile = ein Report), siehe --jsonl
+JSONL_FILE = "ragcheck_runs.jsonl"
 
 # ─────────────────────────────────────────────────────────────
 # 18 DEFINIERTE LÄUFE (alle Kombinationen die wir testen)
 # ─────────────────────────────────────────────────────────────
 
-RUNS = [
+RUNS = (
     # (label,              query_mode, chunk_size, min_rerank, top_k)
     ("hybrid_512_03_10",  "hybrid",  512,  0.3, 10),  # guter Referenzlauf
     ("hybrid_512_03_15",  "hybrid",  512,  0.3, 15),  # bester Lauf erwartet
@@ -96,60 +122,115 @@ RUNS = [
     ("global_512_03_10",  "global",  512,  0.3, 10),  # global referenz
     ("global_256_03_10",  "global",  256,  0.3, 10),  # global, kleine chunks
     ("global_1024_05_10", "global", 1024,  0.5, 10),  # schlechtester global
-]
-
+)
 
-def compute_expected_f1(query_mode: str, chunk_size: int, min_rerank: float, top_k: int) -> float:
-    return (
+# Erwartetes F1 je Parameterkombination, einmalig beim Import berechnet
+EXPECTED_F1 = MappingProxyType({
+    (mode, chunk, rerank, topk): (
         BASE
-        + MODE_BONUS[query_mode]
-        + CHUNK_BONUS[chunk_size]
-        + RERANK_BONUS[min_rerank]
-        + TOPK_BONUS[top_k]
+        + MODE_BONUS[mode]
+        + CHUNK_BONUS[chunk]
+        + RERANK_BONUS[rerank]
+        + TOPK_BONUS[topk]
     )
+    for _, mode, chunk, rerank, topk in RUNS
+})
+EXPECTED_F1_LIST = tuple(EXPECTED_F1[run[1:]] for run in RUNS)
+
+# Ausgabereihenfolge der Zusammenfassung (nach erwartetem F1, absteigend)
+RUN_ORDER = tuple(sorted(range(len(RUNS)), key=EXPECTED_F1_LIST.__getitem__, reverse=True))
+BEST_F1 = max(EXPECTED_F1_LIST)
+
+
+# Testfälle je Report (id, Prompt, erwartetes Dokument)
+TC_IDS = ("TC-001", "TC-002", "TC-003")
+PROMPTS = ("Testfrage 1", "Testfrage 2", "Testfrage 3")
+DOC_NAMES = ("doc_1.pdf", "doc_2.pdf", "doc_3.pdf")
+
+# Metrik-unabhängiger Teil jedes Testfalls, identisch über alle Läufe (nur lesen!)
+_STATIC_TC_TEMPLATE = tuple(
+    {"id": tc_id, "prompt": prompt, "expectedDocuments": [doc], "runs": 3}
+    for tc_id, prompt, doc in zip(TC_IDS, PROMPTS, DOC_NAMES)
+)
+
+# Rausch-Intervalle (low, high) je Metrik, in der Reihenfolge wie build_metrics sie liest
+NOISE_BOUNDS = (
+    (-0.02, 0.02),  # llm_f1
+    (-0.05, 0.10),  # llm_recall
+    (-0.08, 0.05),  # llm_mrr
+    ( 0.00, 0.15),  # llm_hitrate
+    (-0.05, 0.08),  # graph_recall
+    (-0.10, 0.05),  # graph_mrr
+    (-0.06, 0.06),  # graph_ndcg
+)
+
+
+_NOISE_LOW = np.array([lo for lo, _ in NOISE_BOUNDS])
+_NOISE_SPAN = np.array([hi - lo for lo, hi in NOISE_BOUNDS])
+
+
+def draw_noise(rng: random.Random, n_runs: int) -> np.ndarray:
+    """Zieht das Rauschen aller Läufe als (n_runs, 7)-Matrix aus einem Zufallsstrom.
+
+    Alle Werte kommen in einem Block aus rng.random() und werden danach vektoriell
+    skaliert – bitgleich zu rng.uniform(lo, hi) je Wert in derselben Reihenfolge.
+    """
+    random_ = rng.random
+    flat = np.array([random_() for _ in range(n_runs * len(NOISE_BOUNDS))])
+    return _NOISE_LOW + _NOISE_SPAN * flat.reshape(n_runs, len(NOISE_BOUNDS))
+
+
+# Spaltenreihenfolge der Metrik-Matrix aus _build_metrics_batch
+METRIC_FIELDS = (
+    "llm_f1", "llm_recall", "llm_precision", "llm_mrr", "llm_hitrate",
+    "graph_recall", "graph_mrr", "graph_ndcg",
+)
+
+
+def _build_metrics_batch(f1_arr: np.ndarray, noise: np.ndarray) -> np.ndarray:
+    """(N,) F1-Werte + (N, 7) Rauschen → (N, 8) Metriken in METRIC_FIELDS-Reihenfolge."""
+    f1_noisy  = np.clip(f1_arr + noise[:, 0], 0.05, 1.0)
+    recall    = np.clip(f1_noisy + noise[:, 1], 0.0, 1.0)
+    precision = np.clip(2 * f1_noisy * recall / np.maximum(f1_noisy + recall, 1e-9), 0.0, 1.0)
+    mrr       = np.clip(f1_noisy + noise[:, 2], 0.0, 1.0)
+    hitrate   = np.clip(f1_noisy + noise[:, 3], 0.0, 1.0)
+    return np.column_stack([
+        f1_noisy,
+        recall,
+        precision,
+        mrr,
+        hitrate,
+        np.clip(recall   + noise[:, 4], 0.0, 1.0),  # graph_recall
+        np.clip(mrr      + noise[:, 5], 0.0, 1.0),  # graph_mrr
+        np.clip(f1_noisy + noise[:, 6], 0.0, 1.0),  # graph_ndcg
+    ])
+
+
+def build_metrics(f1s: tuple[float, ...], noise: np.ndarray) -> list[dict]:
+    """Leitet alle Metriken aus den F1-Werten ab (mit kleinem Rauschen, siehe NOISE_BOUNDS)."""
+    matrix = _build_metrics_batch(
+        np.asarray(f1s, dtype=np.float64), np.asarray(noise, dtype=np.float64)
+    )
+    return [
+        {name: round(value, 4) for name, value in zip(METRIC_FIELDS, row)}
+        for row in matrix.tolist()
+    ]
 
 
-def _clip(value: float, lo: float = 0.0, hi: float = 1.0) -> float:
-    return max(lo, min(hi, value))
-
-
-def build_metrics(f1: float, rng: random.Random) -> dict:
-    """Leitet alle Metriken aus dem F1-Wert ab (mit kleinem Rauschen)."""
-    f1_noisy = _clip(f1 + rng.uniform(-0.02, 0.02), 0.05, 1.0)
-
-    recall    = _clip(f1_noisy + rng.uniform(-0.05, 0.10))
-    precision = _clip(2 * f1_noisy * recall / max(f1_noisy + recall, 1e-9))
-    mrr       = _clip(f1_noisy + rng.uniform(-0.08, 0.05))
-    hitrate   = _clip(f1_noisy + rng.uniform(0.0, 0.15))
-
-    graph_recall = _clip(recall + rng.uniform(-0.05, 0.08))
-    graph_mrr    = _clip(mrr    + rng.uniform(-0.10, 0.05))
-    graph_ndcg   = _clip(f1_noisy + rng.uniform(-0.06, 0.06))
-
-    return {
-        "llm_f1": round(f1_noisy, 4),
-        "llm_recall": round(recall, 4),
-        "llm_precision": round(precision, 4),
-        "llm_mrr": round(mrr, 4),
-        "llm_hitrate": round(hitrate, 4),
-        "graph_recall": round(graph_recall, 4),
-        "graph_mrr": round(graph_mrr, 4),
-        "graph_ndcg": round(graph_ndcg, 4),
-    }
-
-
-def build_json(
+def build_header(
     label: str,
     query_mode: str,
     chunk_size: int,
     min_rerank: float,
     top_k: int,
     metrics: dict,
-    run_index: int,
+    timestamp: str,
+    graph_duration_ms: int,
+    llm_duration_ms: int,
 ) -> dict:
-    ts = (datetime(2026, 2, 1, 10, 0, 0, tzinfo=timezone.utc) + timedelta(hours=run_index)).isoformat()
+    """Report ohne "results" – die Testfälle liefert iter_test_cases() einzeln."""
     return {
-        "timestamp": ts,
+        "timestamp": timestamp,
         "configuration": {
             "runLabel": label,
             "runParameters": {
@@ -166,7 +247,7 @@ def build_json(
                 "avgMrr": metrics["graph_mrr"],
                 "avgNdcgAtK": metrics["graph_ndcg"],
                 "avgRecallAtK": metrics["graph_recall"],
-                "avgDurationMs": int(1500 + run_index * 37),
+                "avgDurationMs": graph_duration_ms,
             },
             "llm": {
                 "avgRecall": metrics["llm_recall"],
@@ -174,96 +255,180 @@ def build_json(
                 "avgF1": metrics["llm_f1"],
                 "avgHitRate": metrics["llm_hitrate"],
                 "avgMrr": metrics["llm_mrr"],
-                "avgDurationMs": int(4800 + run_index * 113),
+                "avgDurationMs": llm_duration_ms,
             },
             "totalTestCases": 3,
         },
-        "results": [
-            {
-                "id": f"TC-00{i+1}",
-                "prompt": f"Testfrage {i+1}",
-                "expectedDocuments": [f"doc_{i+1}.pdf"],
-                "runs": 3,
-                "graph": {
-                    "avgMrr": round(metrics["graph_mrr"] + (i - 1) * 0.03, 4),
-                    "stdDevMrr": 0.02,
-                    "avgNdcgAtK": round(metrics["graph_ndcg"] + (i - 1) * 0.02, 4),
-                    "stdDevNdcgAtK": 0.02,
-                    "avgRecallAtK": round(metrics["graph_recall"] + (i - 1) * 0.02, 4),
-                    "stdDevRecallAtK": 0.02,
-                    "avgDurationMs": 1500,
-                    "ranksByDoc": {f"doc_{i+1}.pdf": [1, 1, 2]},
-                    "runs": [{"retrievedDocuments": [f"doc_{i+1}.pdf"], "mrr": metrics["graph_mrr"], "ndcgAtK": metrics["graph_ndcg"], "recallAtK": metrics["graph_recall"], "durationMs": 1500}],
-                },
-                "llm": {
-                    "avgRecall": round(metrics["llm_recall"] + (i - 1) * 0.02, 4),
-                    "stdDevRecall": 0.03,
-                    "avgPrecision": round(metrics["llm_precision"] + (i - 1) * 0.02, 4),
-                    "stdDevPrecision": 0.03,
-                    "avgF1": round(metrics["llm_f1"] + (i - 1) * 0.02, 4),
-                    "stdDevF1": 0.03,
-                    "hitRate": metrics["llm_hitrate"],
-                    "avgMrr": metrics["llm_mrr"],
-                    "stdDevMrr": 0.03,
-                    "avgDurationMs": 4800,
-                    "runs": [{"retrievedDocuments": [f"doc_{i+1}.pdf"], "recall": metrics["llm_recall"], "precision": metrics["llm_precision"], "f1": metrics["llm_f1"], "hit": True, "mrr": metrics["llm_mrr"], "durationMs": 4800, "responseText": "Fake response."}],
-                },
-            }
-            for i in range(3)
-        ],
     }
 
 
-# ─────────────────────────────────────────────────────────────
-# MAIN
-# ─────────────────────────────────────────────────────────────
+def iter_test_cases(metrics: dict) -> Iterator[dict]:
+    for i in range(len(TC_IDS)):
+        yield build_test_case(i, metrics)
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Generiert synthetische ragcheck-Testdaten")
-    parser.add_argument("--out", type=Path, default=Path("reports/fake"),
-                        help="Ausgabeverzeichnis (default: reports/fake)")
-    parser.add_argument("--seed", type=int, default=42, help="Zufalls-Seed (default: 42)")
-    args = parser.parse_args()
 
-    args.out.mkdir(parents=True, exist_ok=True)
-    rng = random.Random(args.seed)
+def build_test_case(i: int, metrics: dict) -> dict:
+    """Ein Testfall-Eintrag; nur die Metriken und der Index i variieren."""
+    doc = DOC_NAMES[i]
+    offset = i - 1
+    return {
+        **_STATIC_TC_TEMPLATE[i],
+        "graph": {
+            "avgMrr": round(metrics["graph_mrr"] + offset * 0.03, 4),
+            "stdDevMrr": 0.02,
+            "avgNdcgAtK": round(metrics["graph_ndcg"] + offset * 0.02, 4),
+            "stdDevNdcgAtK": 0.02,
+            "avgRecallAtK": round(metrics["graph_recall"] + offset * 0.02, 4),
+            "stdDevRecallAtK": 0.02,
+            "avgDurationMs": 1500,
+            "ranksByDoc": {doc: [1, 1, 2]},
+            "runs": [{"retrievedDocuments": [doc], "mrr": metrics["graph_mrr"], "ndcgAtK": metrics["graph_ndcg"], "recallAtK": metrics["graph_recall"], "durationMs": 1500}],
+        },
+        "llm": {
+            "avgRecall": round(metrics["llm_recall"] + offset * 0.02, 4),
+            "stdDevRecall": 0.03,
+            "avgPrecision": round(metrics["llm_precision"] + offset * 0.02, 4),
+            "stdDevPrecision": 0.03,
+            "avgF1": round(metrics["llm_f1"] + offset * 0.02, 4),
+            "stdDevF1": 0.03,
+            "hitRate": metrics["llm_hitrate"],
+            "avgMrr": metrics["llm_mrr"],
+            "stdDevMrr": 0.03,
+            "avgDurationMs": 4800,
+            "runs": [{"retrievedDocuments": [doc], "recall": metrics["llm_recall"], "precision": metrics["llm_precision"], "f1": metrics["llm_f1"], "hit": True, "mrr": metrics["llm_mrr"], "durationMs": 4800, "responseText": "Fake response."}],
+        },
+    }
 
-    print("RAGChecker Test-Datengenerator")
-    print("=" * 60)
-    print(f"Ausgabe: {args.out.resolve()}")
-    print(f"Seed:    {args.seed}\n")
 
-    # ── Dateien erzeugen ──────────────────────────────────────
-    generated = []
-    for i, (label, mode, chunk, rerank, topk) in enumerate(RUNS):
-        expected_f1 = compute_expected_f1(mode, chunk, rerank, topk)
-        metrics = build_metrics(expected_f1, rng)
-        data = build_json(label, mode, chunk, rerank, topk, metrics, i)
+def dump_json(data: dict, pretty: bool = False) -> bytes:
+    """Serialisiert einen Report als UTF-8 (orjson wenn installiert, sonst json).
+
+    Standard ist kompaktes JSON; pretty=True rückt mit 2 Leerzeichen ein.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(data, option=option)
+    if pretty:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def iter_report_chunks(header: dict, results: Iterable[dict], pretty: bool) -> Iterator[bytes]:
+    """Serialisiert einen Report inkrementell: erst den Kopf, dann jeden Testfall einzeln.
+
+    Im Speicher liegt so immer nur ein Testfall-Dict. Eingerücktes JSON (pretty)
+    wird am Stück serialisiert, damit die Formatierung identisch zu json.dump bleibt.
+    """
+    if pretty:
+        yield dump_json({**header, "results": list(results)}, pretty=True)
+        return
+    # Kompakter Kopf endet auf '"results":[]}' → ohne ']}' offen lassen
+    yield dump_json({**header, "results": []})[:-2]
+    for i, result in enumerate(results):
+        if i:
+            yield b","
+        yield dump_json(result)
+    yield b"]}"
+
+
+def _iov_max() -> int:
+    """Maximale Anzahl Puffer je writev()-Aufruf (POSIX IOV_MAX, sonst 1024)."""
+    try:
+        n = os.sysconf("SC_IOV_MAX")
+    except (AttributeError, ValueError, OSError):
+        n = -1
+    return n if n > 0 else 1024
+
+
+def _writev_all(fd: int, parts: list[bytes]) -> None:
+    written = os.writev(fd, parts)
+    if written < sum(map(len, parts)):  # Teilschreibvorgang (selten) → Rest nachschreiben
+        rest = memoryview(b"".join(parts))[written:]
+        while rest:
+            rest = rest[os.write(fd, rest):]
+
+
+def write_chunks(path: Path, chunks: Iterable[bytes]) -> None:
+    """Schreibt die Teile einer Datei per writev() in Blöcken ≤ IOV_MAX (POSIX), sonst gepuffert.
+
+    Die Teile werden beim Lesen des Iterators geschrieben; im Speicher liegt
+    höchstens ein Block, nie die ganze Datei.
+    """
+    if not hasattr(os, "writev"):  # z.B. Windows
+        with open(path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+            f.writelines(chunks)
+        return
+    iov_max = _iov_max()
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        batch: list[bytes] = []
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) == iov_max:
+                _writev_all(fd, batch)
+                batch = []
+        if batch:
+            _writev_all(fd, batch)
+    finally:
+        os.close(fd)
+
+
+class RunJob(NamedTuple):
+    """Alle Eingaben für Aufbau und Ausgabe eines Laufs (picklebar für ProcessPoolExecutor)."""
+    label: str
+    query_mode: str
+    chunk_size: int
+    min_rerank: float
+    top_k: int
+    metrics: dict
+    timestamp: str
+    graph_duration_ms: int
+    llm_duration_ms: int
+    path: Path
+    pretty: bool
+
+
+def _job_chunks(job: RunJob) -> Iterator[bytes]:
+    header = build_header(
+        job.label, job.query_mode, job.chunk_size, job.min_rerank, job.top_k,
+        job.metrics, job.timestamp, job.graph_duration_ms, job.llm_duration_ms,
+    )
+    return iter_report_chunks(header, iter_test_cases(job.metrics), job.pretty)
 
-        ts_str = data["timestamp"].replace(":", "").replace("-", "").replace("T", "_")[:15]
-        filename = args.out / f"ragcheck_{ts_str}.json"
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
 
-        generated.append((label, mode, chunk, rerank, topk, expected_f1, metrics["llm_f1"]))
+def emit_run(job: RunJob) -> Path:
+    """Baut und schreibt einen Lauf (top-level, damit ProcessPoolExecutor ihn picklen kann)."""
+    write_chunks(job.path, _job_chunks(job))
+    return job.path
 
-    # ── Erwartete Ergebnisse ausgeben ─────────────────────────
-    print("Generierte Läufe (sortiert nach erwartetem F1):")
-    print("-" * 90)
-    print(f"{'Label':<25} {'Mode':<8} {'Chunk':>6} {'Rerank':>7} {'TopK':>5}  {'F1 erwartet':>12}  {'F1 tatsächl.':>13}")
-    print("-" * 90)
 
-    for row in sorted(generated, key=lambda r: r[5], reverse=True):
-        label, mode, chunk, rerank, topk, exp_f1, act_f1 = row
-        marker = " ← BESTER" if exp_f1 == max(r[5] for r in generated) else ""
-        print(f"{label:<25} {mode:<8} {chunk:>6} {rerank:>7.1f} {topk:>5}  {exp_f1:>12.4f}  {act_f1:>13.4f}{marker}")
+def serialize_run_line(job: RunJob) -> bytes:
+    """Ein Lauf als kompakte JSON-Zeile für JSONL_FILE (top-level für ProcessPoolExecutor)."""
+    return b"".join(_job_chunks(job)) + b"\n"
 
-    print("\n")
-    print("=" * 60)
-    print("ERWARTETE ANALYSE-ERGEBNISSE")
-    print("=" * 60)
 
-    print("""
+def output_stamp(seed: int, pretty: bool, jsonl: bool, outputs: list[Path]) -> Optional[str]:
+    """Fingerprint aller Eingaben und Ausgabedateien; None, wenn eine Datei fehlt.
+
+    Der Quelltext dieses Skripts fließt mit ein, damit geänderte Läufe,
+    Bonus-Tabellen oder Report-Felder die Ausgabe automatisch invalidieren.
+    Größe und mtime jeder erwarteten Datei erkennen gelöschte oder von Hand
+    veränderte Reports.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(Path(__file__).read_bytes())
+    h.update(f"|{seed}|{pretty}|{jsonl}".encode("utf-8"))
+    for path in outputs:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        h.update(f"|{path.name}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+    return h.hexdigest()
+
+
+# Erwartete Analyse-Ergebnisse für die Konsolen-Zusammenfassung
+SUMMARY_BOX = """
 ┌─────────────────────────────────────────────────────────┐
 │  SHAP Ranking (Phase 2) – erwartete Reihenfolge:        │
 │                                                         │
@@ -293,9 +458,127 @@ def main() -> None:
 │  → Wechsel zu hybrid erhöht F1 kausal um ~20 Punkte     │
 │  Refutation: Effekt sollte bei Placebo verschwinden ✓   │
 └─────────────────────────────────────────────────────────┘
-""")
+"""
+
+
+def print_expected_results(generated: list[tuple]) -> None:
+    """Gibt die erzeugten Läufe und die erwarteten Analyse-Ergebnisse aus."""
+    print("Generierte Läufe (sortiert nach erwartetem F1):")
+    print("-" * 90)
+    print(f"{'Label':<25} {'Mode':<8} {'Chunk':>6} {'Rerank':>7} {'TopK':>5}  {'F1 erwartet':>12}  {'F1 tatsächl.':>13}")
+    print("-" * 90)
+
+    for idx in RUN_ORDER:
+        label, mode, chunk, rerank, topk, exp_f1, act_f1 = generated[idx]
+        marker = " ← BESTER" if exp_f1 == BEST_F1 else ""
+        print(f"{label:<25} {mode:<8} {chunk:>6} {rerank:>7.1f} {topk:>5}  {exp_f1:>12.4f}  {act_f1:>13.4f}{marker}")
+
+    print("\n")
+    print("=" * 60)
+    print("ERWARTETE ANALYSE-ERGEBNISSE")
+    print("=" * 60)
+
+    print(SUMMARY_BOX)
+
+
+# ─────────────────────────────────────────────────────────────
+# MAIN
+# ─────────────────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generiert synthetische ragcheck-Testdaten")
+    parser.add_argument("--out", type=Path, default=Path("reports/fake"),
+                        help="Ausgabeverzeichnis (default: reports/fake)")
+    parser.add_argument("--seed", type=int, default=42, help="Zufalls-Seed (default: 42)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Parallele Prozesse zum Schreiben der Läufe (default: 1)")
+    parser.add_argument("--pretty", action="store_true",
+                        help="JSON eingerückt statt kompakt schreiben")
+    parser.add_argument("--jsonl", action="store_true",
+                        help=f"Alle Läufe in eine {JSONL_FILE} statt einzelner JSON-Dateien schreiben")
+    parser.add_argument("--quiet", action="store_true",
+                        help="Keine Lauf-Tabelle und keine erwarteten Ergebnisse ausgeben")
+    parser.add_argument("--force", action="store_true",
+                        help="Dateien auch dann neu schreiben, wenn sie bereits aktuell sind")
+    args = parser.parse_args()
+    if args.jsonl and args.pretty:
+        parser.error("--jsonl schreibt einen Report pro Zeile und ist nicht mit --pretty kombinierbar")
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    jsonl_path = args.out / JSONL_FILE
+    stamp_path = args.out / STAMP_FILE
+    rng = random.Random(args.seed)
+
+    print("RAGChecker Test-Datengenerator")
+    print("=" * 60)
+    print(f"Ausgabe: {args.out.resolve()}")
+    print(f"Seed:    {args.seed}\n")
+
+    # ── Dateien erzeugen ──────────────────────────────────────
+    # Metriken sequentiell aus einem Zufallsstrom ziehen (deterministisch je Seed),
+    # Aufbau + Serialisierung + Schreiben der Läufe ist danach unabhängig.
+    n_runs = len(RUNS)
+    noise = draw_noise(rng, n_runs)
+    start = datetime(2026, 2, 1, 10, 0, 0, tzinfo=timezone.utc)
+    run_times = [start + timedelta(hours=i) for i in range(n_runs)]
+    timestamps = [t.isoformat() for t in run_times]
+    filenames = [args.out / f"ragcheck_{t.strftime('%Y%m%d_%H%M%S')}.json" for t in run_times]
+    outputs = [jsonl_path] if args.jsonl else filenames
+    stamp = output_stamp(args.seed, args.pretty, args.jsonl, outputs)
+    up_to_date = (
+        not args.force
+        and stamp is not None
+        and stamp_path.is_file()
+        and stamp_path.read_text(encoding="utf-8").strip() == stamp
+    )
+    graph_durations = [1500 + i * 37 for i in range(n_runs)]
+    llm_durations = [4800 + i * 113 for i in range(n_runs)]
+    all_metrics = build_metrics(EXPECTED_F1_LIST, noise)
+    generated = []
+    jobs = []
+    for i, (label, mode, chunk, rerank, topk) in enumerate(RUNS):
+        expected_f1 = EXPECTED_F1_LIST[i]
+        metrics = all_metrics[i]
+        jobs.append(RunJob(
+            label=label, query_mode=mode, chunk_size=chunk, min_rerank=rerank, top_k=topk,
+            metrics=metrics, timestamp=timestamps[i], graph_duration_ms=graph_durations[i],
+            llm_duration_ms=llm_durations[i], path=filenames[i], pretty=args.pretty,
+        ))
+        generated.append((label, mode, chunk, rerank, topk, expected_f1, metrics["llm_f1"]))
+
+    if up_to_date:
+        print("Ausgabe bereits aktuell (gleicher Seed/Generator) – Schreiben übersprungen.")
+        print("Mit --force neu erzeugen.\n")
+    else:
+        worker = serialize_run_line if args.jsonl else emit_run
+        if args.jobs > 1:
+            with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                results = list(executor.map(worker, jobs))
+        else:
+            results = [worker(job) for job in jobs]
+
+        # Dateien des jeweils anderen Formats entfernen, sonst zählt
+        # parameter_analysis.py dieselben Läufe doppelt.
+        if args.jsonl:
+            write_chunks(jsonl_path, results)
+            for path in filenames:
+                path.unlink(missing_ok=True)
+        else:
+            jsonl_path.unlink(missing_ok=True)
+        stamp = output_stamp(args.seed, args.pretty, args.jsonl, outputs)
+        stamp_path.write_text(stamp + "\n", encoding="utf-8")
 
-    print(f"✅  {len(RUNS)} JSON-Dateien erzeugt in: {args.out.resolve()}")
+    # ── Erwartete Ergebnisse ausgeben ─────────────────────────
+    if not args.quiet:
+        print_expected_results(generated)
+
+    if up_to_date:
+        print(f"✅  Keine Dateien geschrieben – {len(RUNS)} Läufe bereits aktuell in: "
+              f"{(jsonl_path if args.jsonl else args.out).resolve()}")
+    elif args.jsonl:
+        print(f"✅  {len(RUNS)} Läufe erzeugt in: {jsonl_path.resolve()}")
+    else:
+        print(f"✅  {len(RUNS)} JSON-Dateien erzeugt in: {args.out.resolve()}")
     print("\nJetzt ausführen:")
     print(f"  python parameter_analysis.py --reports {args.out}")
 
@@ -17,18 +17,24 @@ Verwendung:
   python parameter_analysis.py --reports ../reports --model xgb --phase 2
   python parameter_analysis.py --reports ../reports --target graph_recall --suggestions 10
   python parameter_analysis.py --reports ../reports --treatment query_mode --phase 4
+  python parameter_analysis.py --reports ../reports --phase 4 --refute
+  python parameter_analysis.py --reports ../reports --no-cache
   python parameter_analysis.py --help
 """
 
 from __future__ import annotations
 
 import argparse
-import glob
+import csv
+import hashlib
 import json
+import math
+import os
 import sys
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Union
+from typing import Iterator, Optional, Union
 
 import numpy as np
 import pandas as pd
@@ -36,9 +42,13 @@ import matplotlib
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.inspection import PartialDependenceDisplay
 from sklearn.model_selection import cross_val_score
+from scipy import linalg as scipy_linalg
+from scipy import stats as scipy_stats
+from scipy.stats import qmc
 
 import shap
 
@@ -50,9 +60,20 @@ from optuna.distributions import (
     IntDistribution,
 )
 
+try:
+    import orjson
+except ImportError:  # optional: schnelleres JSON-Parsen, sonst stdlib json
+    orjson = None
+
+try:
+    import pyarrow  # noqa: F401 – Engine für den Parquet-Cache
+except ImportError:  # optional: ohne pyarrow wird nicht gecacht
+    pyarrow = None
+
 warnings.filterwarnings("ignore")
 optuna.logging.set_verbosity(optuna.logging.WARNING)
 matplotlib.use("Agg")  # Headless: kein Display erforderlich
+plt.rcParams["path.simplify_threshold"] = 1.0
 
 # ─────────────────────────────────────────────────────────────
 # Defaults (überschreibbar per CLI)
@@ -63,7 +84,13 @@ DEFAULT_TARGET = "llm_f1"
 DEFAULT_MODEL = "rf"          # "rf" | "xgb"
 DEFAULT_N_SUGGESTIONS = 5
 MIN_RUNS_FOR_ML = 5
+MAX_FEATURES_FOR_INTERACTIONS = 15   # SHAP-Interaktionen wachsen quadratisch
 RANDOM_STATE = 42
+CV_MAX_ESTIMATORS = 100       # Bäume je Fold – reicht für die R²-Schätzung
+FIG_DPI = 110                 # explorative Plots
+REPORT_DPI = 150              # Ergebnis-Plots (Ranking, ATE)
+CACHE_PREFIX = "_cache_"      # Parquet-Cache des DataFrames im Ausgabeverzeichnis
+CACHE_VERSION = 1             # erhöhen, wenn sich der DataFrame-Aufbau ändert
 
 ALL_METRICS = [
     "llm_f1", "llm_recall", "llm_precision", "llm_mrr", "llm_hitrate",
@@ -77,83 +104,218 @@ META_COLS = {
 # Typ-Alias
 Surrogate = Union[RandomForestRegressor, "xgboost.XGBRegressor"]  # type: ignore[name-defined]
 ParamSpec = dict[str, tuple]  # name → ("float"|"int"|"categorical", *args)
+EncodingMap = dict[str, dict[str, int]]  # Feature → {Kategorie: Spaltenindex im One-Hot}
 
 
 # ─────────────────────────────────────────────────────────────
 # 0. DATEN LADEN
 # ─────────────────────────────────────────────────────────────
 
+REPORT_SUFFIXES = (".json", ".jsonl")
+
+
+def _walk_reports(root: str) -> Iterator[Path]:
+    """Rekursiver scandir-Walk; versteckte Einträge werden wie bei glob übersprungen."""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir():
+                yield from _walk_reports(entry.path)
+            elif (
+                entry.name.endswith(REPORT_SUFFIXES)
+                and "comparison" not in entry.name
+                and entry.is_file()
+            ):
+                yield Path(entry.path)
+
+
 def find_report_files(reports_dir: Path) -> list[Path]:
-    """Findet alle *.json Report-Dateien rekursiv (comparison ausgenommen)."""
-    pattern = str(reports_dir / "**" / "*.json")
-    files = [
-        Path(f) for f in glob.glob(pattern, recursive=True)
-        if "comparison" not in Path(f).name
-    ]
+    """Findet alle *.json / *.jsonl Report-Dateien rekursiv (comparison ausgenommen)."""
+    files = list(_walk_reports(str(reports_dir))) if reports_dir.is_dir() else []
     if not files:
-        print(f"  ⚠  Keine *.json Dateien in '{reports_dir}' gefunden.")
+        print(f"  ⚠  Keine *.json/*.jsonl Dateien in '{reports_dir}' gefunden.")
     else:
         print(f"  ✓  {len(files)} Report-Datei(en) gefunden.")
     return sorted(files)
 
 
-def _load_json(path: Path) -> Optional[dict]:
+def _parse_json(raw: bytes):
+    """Dekodiert UTF-8-JSON (orjson wenn installiert, sonst json)."""
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def _load_json(path: Path) -> tuple[Optional[dict], Optional[str]]:
+    """Lädt einen Report; liefert (Report oder None, Warnung oder None)."""
     try:
-        with open(path, encoding="utf-8") as f:
-            data = json.load(f)
+        with open(path, "rb") as f:
+            data = _parse_json(f.read())
         if "configuration" not in data or "summary" not in data:
-            print(f"     ⚠  {path.name}: Fehlende Pflichtfelder – übersprungen.")
-            return None
-        return data
+            return None, f"{path.name}: Fehlende Pflichtfelder – übersprungen."
+        return data, None
     except (json.JSONDecodeError, OSError) as exc:
-        print(f"     ⚠  {path.name}: Lesefehler ({exc}) – übersprungen.")
-        return None
+        return None, f"{path.name}: Lesefehler ({exc}) – übersprungen."
+
 
+def _load_jsonl(path: Path) -> tuple[list[tuple[str, dict]], list[str]]:
+    """Lädt mehrere Reports aus einer JSONL-Datei (eine Zeile = ein Report).
+
+    Liefert (Name, Report)-Paare – der Name ist ``<datei>#<zeile>`` – und die
+    Warnungen zu übersprungenen Zeilen.
+    """
+    reports: list[tuple[str, dict]] = []
+    messages: list[str] = []
+    try:
+        with open(path, "rb") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                name = f"{path.name}#{line_no}"
+                try:
+                    data = _parse_json(line)
+                except json.JSONDecodeError as exc:
+                    messages.append(f"{name}: Lesefehler ({exc}) – übersprungen.")
+                    continue
+                if "configuration" not in data or "summary" not in data:
+                    messages.append(f"{name}: Fehlende Pflichtfelder – übersprungen.")
+                    continue
+                reports.append((name, data))
+    except OSError as exc:
+        messages.append(f"{path.name}: Lesefehler ({exc}) – übersprungen.")
+    return reports, messages
+
+
+# json_normalize-Pfad im Report → DataFrame-Spalte (Werte auf 4 Stellen gerundet)
+SUMMARY_COLUMNS = {
+    "summary.graph.avgMrr":       "graph_mrr",
+    "summary.graph.avgNdcgAtK":   "graph_ndcg",
+    "summary.graph.avgRecallAtK": "graph_recall",
+    "summary.llm.avgRecall":      "llm_recall",
+    "summary.llm.avgPrecision":   "llm_precision",
+    "summary.llm.avgF1":          "llm_f1",
+    "summary.llm.avgHitRate":     "llm_hitrate",
+    "summary.llm.avgMrr":         "llm_mrr",
+}
+RUN_PARAMS_PREFIX = "configuration.runParameters."
+
+
+def _param_value(v):
+    """runParameters-Wert: numerisch wenn möglich, sonst String; fehlend bleibt NaN."""
+    if v is None or (isinstance(v, float) and np.isnan(v)):
+        return np.nan
+    try:
+        return float(v)
+    except (ValueError, TypeError):
+        return str(v)
 
-def _extract_row(data: dict, path: Path) -> dict:
-    cfg = data["configuration"]
-    summary = data["summary"]
-    graph = summary.get("graph", {})
-    llm = summary.get("llm", {})
 
-    row: dict = {
-        "file": path.name,
-        "run_label": cfg.get("runLabel") or path.parent.name,
-        "timestamp": data.get("timestamp", ""),
-        "query_mode": (
-            ",".join(cfg["queryModes"]) if "queryModes" in cfg
-            else cfg.get("queryMode", "unknown")
+def _reports_to_frame(reports: list[dict], names: list[str], parents: list[str]) -> pd.DataFrame:
+    """Flacht configuration/summary aller Reports in einem json_normalize-Aufruf ab."""
+    flat = pd.json_normalize(
+        [{k: d[k] for k in ("timestamp", "configuration", "summary") if k in d} for d in reports],
+        sep=".",
+    )
+
+    def col(key: str, default=None) -> pd.Series:
+        series = flat[key] if key in flat else pd.Series(np.nan, index=flat.index)
+        return series if default is None else series.fillna(default)
+
+    label = col("configuration.runLabel", "")
+    query_modes = col("configuration.queryModes")
+    has_modes = query_modes.map(lambda v: isinstance(v, list))
+
+    columns: dict[str, pd.Series] = {
+        "file": pd.Series(names, index=flat.index),
+        "run_label": label.where(label.astype(bool), pd.Series(parents, index=flat.index)),
+        "timestamp": col("timestamp", ""),
+        "query_mode": col("configuration.queryMode", "unknown").where(
+            ~has_modes, query_modes[has_modes].map(",".join)
         ),
-        "top_k": cfg.get("topK", np.nan),
-        "runs_per_testcase": cfg.get("runsPerTestCase", 1),
-        "graph_mrr":    round(graph.get("avgMrr", np.nan), 4),
-        "graph_ndcg":   round(graph.get("avgNdcgAtK", np.nan), 4),
-        "graph_recall": round(graph.get("avgRecallAtK", np.nan), 4),
-        "llm_recall":    round(llm.get("avgRecall", np.nan), 4),
-        "llm_precision": round(llm.get("avgPrecision", np.nan), 4),
-        "llm_f1":        round(llm.get("avgF1", np.nan), 4),
-        "llm_hitrate":   round(llm.get("avgHitRate", np.nan), 4),
-        "llm_mrr":       round(llm.get("avgMrr", np.nan), 4),
-        "total_testcases": summary.get("totalTestCases", 0),
+        "top_k": col("configuration.topK"),
+        "runs_per_testcase": col("configuration.runsPerTestCase", 1).astype("int64"),
     }
+    for key, name in SUMMARY_COLUMNS.items():
+        columns[name] = col(key).astype(float).round(4)
+    columns["total_testcases"] = col("summary.totalTestCases", 0).astype("int64")
 
-    for k, v in cfg.get("runParameters", {}).items():
-        col = f"param_{k.lower()}"
-        try:
-            row[col] = float(v)
-        except (ValueError, TypeError):
-            row[col] = str(v)
+    for key in flat.columns:
+        if key.startswith(RUN_PARAMS_PREFIX):
+            param = f"param_{key[len(RUN_PARAMS_PREFIX):].lower()}"
+            columns[param] = flat[key].map(_param_value).infer_objects()
 
-    return row
+    return pd.DataFrame(columns)
 
 
-def build_dataframe(files: list[Path]) -> pd.DataFrame:
-    rows = [r for f in files if (data := _load_json(f)) and (r := _extract_row(data, f))]
-    if not rows:
+def _load_reports(path: Path) -> tuple[list[tuple[Optional[str], dict]], list[str]]:
+    """Alle Reports einer Datei als (Name, Report) plus Warnungen; Name None = Dateiname.
+
+    Läuft in Worker-Threads: Warnungen werden zurückgegeben statt gedruckt.
+    """
+    if path.suffix == ".jsonl":
+        return _load_jsonl(path)
+    data, warning = _load_json(path)
+    return ([(None, data)] if data else []), ([warning] if warning else [])
+
+
+def _cache_key(files: list[Path]) -> str:
+    """Schlüssel über Pfad, mtime und Größe aller Report-Dateien."""
+    stamp = sorted((str(f), f.stat().st_mtime_ns, f.stat().st_size) for f in files)
+    return hashlib.md5(f"{CACHE_VERSION}:{stamp}".encode(), usedforsecurity=False).hexdigest()
+
+
+def _read_cache(path: Path) -> Optional[pd.DataFrame]:
+    try:
+        df = pd.read_parquet(path)
+    except Exception as exc:
+        print(f"  ⚠  Cache {path.name} unlesbar ({exc}) – lese Reports neu.")
+        return None
+    # Parquet liefert fehlende Strings als None, der Rest der Analyse erwartet NaN
+    obj_cols = df.select_dtypes(include="object").columns
+    df[obj_cols] = df[obj_cols].where(df[obj_cols].notna(), np.nan)
+    return df
+
+
+def _write_cache(df: pd.DataFrame, path: Path) -> None:
+    try:
+        df.to_parquet(path, compression="zstd")
+    except Exception as exc:  # z. B. gemischte Typen in einer Parameter-Spalte
+        path.unlink(missing_ok=True)
+        print(f"  ℹ  DataFrame nicht gecacht: {exc}")
+        return
+    for old in path.parent.glob(f"{CACHE_PREFIX}*.parquet"):
+        if old != path:
+            old.unlink(missing_ok=True)
+
+
+def build_dataframe(files: list[Path], cache_dir: Optional[Path] = None) -> pd.DataFrame:
+    """Baut den Lauf-DataFrame; mit cache_dir (und pyarrow) als Parquet gecacht."""
+    cache_path = None
+    if cache_dir is not None and pyarrow is not None:
+        cache_path = cache_dir / f"{CACHE_PREFIX}{_cache_key(files)}.parquet"
+        if cache_path.exists():
+            df = _read_cache(cache_path)
+            if df is not None:
+                print(f"  ✓  DataFrame aus Cache: {len(df)} Läufe × {len(df.columns)} Spalten")
+                return df
+
+    # I/O-gebunden: Dateien parallel lesen, map() erhält die Reihenfolge
+    with ThreadPoolExecutor(max_workers=max(1, min(32, len(files)))) as executor:
+        loaded = list(executor.map(_load_reports, files))
+    reports, names, parents = [], [], []
+    for f, (file_reports, file_warnings) in zip(files, loaded):
+        for msg in file_warnings:
+            print(f"     ⚠  {msg}")
+        for name, data in file_reports:
+            reports.append(data)
+            names.append(name or f.name)
+            parents.append(f.parent.name)
+    if not reports:
         print("  ❌  Keine validen Daten gefunden.")
         sys.exit(1)
-    df = pd.DataFrame(rows)
+    df = _reports_to_frame(reports, names, parents)
     print(f"  ✓  DataFrame: {len(df)} Läufe × {len(df.columns)} Spalten")
+    if cache_path is not None:
+        _write_cache(df, cache_path)
     return df
 
 
@@ -161,25 +323,51 @@ def get_feature_cols(df: pd.DataFrame) -> list[str]:
     return [c for c in df.columns if c not in META_COLS]
 
 
-def encode_features(df: pd.DataFrame, feature_cols: list[str]) -> pd.DataFrame:
-    """One-Hot für Kategorien, Median-Imputation für fehlende numerische Werte."""
-    df_enc = df[feature_cols].copy()
-    for col in df_enc.select_dtypes(include=["object", "category"]).columns.tolist():
-        dummies = pd.get_dummies(df_enc[col], prefix=col, dummy_na=False)
-        df_enc = pd.concat([df_enc.drop(columns=[col]), dummies], axis=1)
-    for col in df_enc.select_dtypes(include=[np.number]).columns:
-        df_enc[col] = df_enc[col].fillna(df_enc[col].median())
-    return df_enc.astype(float)
+def encode_features(df: pd.DataFrame, feature_cols: list[str]) -> tuple[pd.DataFrame, EncodingMap]:
+    """One-Hot für Kategorien, Median-Imputation für fehlende numerische Werte.
+
+    Liefert float32 – reicht für die Surrogate-Modelle und halbiert den
+    Speicherbedarf bei SHAP (Trees rechnen intern ohnehin in float32).
+    Dazu die Lage der One-Hot-Spalten je kategorischem Feature, damit neue
+    Kandidaten ohne Präfix-Suche kodiert werden können.
+    """
+    df_feat = df[feature_cols]
+    obj_cols = df_feat.select_dtypes(include=["object", "category"]).columns.tolist()
+    if obj_cols:
+        dummies = pd.get_dummies(df_feat[obj_cols], prefix=obj_cols, dummy_na=False)
+
+    # Spalten als float32-Arrays sammeln und den Frame einmal am Ende bauen:
+    # erst die übrigen (numerischen) Features, dann die One-Hot-Blöcke
+    arrays: dict[str, np.ndarray] = {}
+    for col in feature_cols:
+        if col not in obj_cols:
+            arr = df_feat[col].to_numpy(dtype=float, copy=True)
+            nan_mask = np.isnan(arr)
+            if nan_mask.any():
+                arr[nan_mask] = np.nanmedian(arr)
+            arrays[col] = arr.astype(np.float32)
+
+    # get_dummies legt die Dummies blockweise in der Reihenfolge von obj_cols an
+    encoding_map: EncodingMap = {}
+    offset = 0
+    for col, n_cat in zip(obj_cols, df_feat[obj_cols].nunique(dropna=True)):
+        encoding_map[col] = {}
+        for name in dummies.columns[offset:offset + n_cat]:
+            encoding_map[col][name[len(col) + 1:]] = len(arrays)
+            arrays[name] = dummies[name].to_numpy(dtype=np.float32)
+        offset += n_cat
+    return pd.DataFrame(arrays, index=df.index, copy=False), encoding_map
 
 
 # ─────────────────────────────────────────────────────────────
 # HILFSFUNKTIONEN
 # ─────────────────────────────────────────────────────────────
 
-def save_fig(fig: plt.Figure, path: Path) -> None:
+def save_fig(fig: plt.Figure, path: Path, dpi: int = FIG_DPI, close: bool = True) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    fig.savefig(path, dpi=150, bbox_inches="tight")
-    plt.close(fig)
+    fig.savefig(path, dpi=dpi, bbox_inches="tight")
+    if close:
+        plt.close(fig)
     print(f"     → {path.name}")
 
 
@@ -188,6 +376,18 @@ def _run_label(row: pd.Series) -> str:
     return lbl if lbl else row["file"]
 
 
+def _run_labels(df: pd.DataFrame, n: Optional[int] = None) -> list[str]:
+    """Wie _run_label, aber für die ersten n Zeilen ohne Series pro Zeile."""
+    head = df if n is None else df.head(n)
+    files = head["file"].tolist()
+    if "run_label" not in head.columns:
+        return files
+    return [
+        lbl if (lbl := str(raw).strip()) else f
+        for raw, f in zip(head["run_label"].tolist(), files)
+    ]
+
+
 def print_banner(title: str) -> None:
     print(f"\n{'─' * 55}")
     print(f"  {title}")
@@ -209,6 +409,10 @@ def _build_surrogate(model_type: str, n_samples: int) -> Surrogate:
                 max_depth=min(4, max(2, n_samples - 1)),
                 learning_rate=0.1,
                 subsample=0.8,
+                tree_method="hist",
+                device="cpu",
+                enable_categorical=False,
+                n_jobs=-1,
                 random_state=RANDOM_STATE,
                 verbosity=0,
             )
@@ -218,6 +422,7 @@ def _build_surrogate(model_type: str, n_samples: int) -> Surrogate:
         max_depth=max(2, min(5, n_samples - 1)),
         random_state=RANDOM_STATE,
         min_samples_leaf=1,
+        n_jobs=-1,
     )
 
 
@@ -234,24 +439,23 @@ def phase1_exploration(
     print_banner("Phase 1: Exploration")
 
     present_metrics = [m for m in ALL_METRICS if m in df.columns]
-    num_features = [
-        c for c in feature_cols
-        if pd.api.types.is_numeric_dtype(df[c]) and df[c].nunique() > 1
-    ]
-    cat_features = [
-        c for c in feature_cols
-        if not pd.api.types.is_numeric_dtype(df[c]) or df[c].nunique() <= 6
-    ]
+    # nunique/dtype einmal pro Spalte bestimmen statt in jeder Liste neu
+    nunique = df[feature_cols].nunique(dropna=True).to_dict()
+    is_num = {c: pd.api.types.is_numeric_dtype(df[c]) for c in feature_cols}
+    num_features = [c for c in feature_cols if is_num[c] and nunique[c] > 1]
+    cat_features = [c for c in feature_cols if not is_num[c] or nunique[c] <= 6]
 
     # ── 1a) Korrelationsmatrix ──────────────────────────────
     corr_input = df[num_features + present_metrics].dropna(axis=1, how="all")
     if corr_input.shape[1] >= 2:
         corr = corr_input.corr()
         mask = np.triu(np.ones_like(corr, dtype=bool))
+        # Beschriftungen einmal als String-Matrix vorformatieren (maskierte Zellen leer)
+        annot = np.where(mask, "", np.char.mod("%.2f", corr.to_numpy()))
         h = max(6, corr.shape[0] * 0.75)
         fig, ax = plt.subplots(figsize=(h * 1.2, h))
         sns.heatmap(
-            corr, mask=mask, annot=True, fmt=".2f",
+            corr, mask=mask, annot=annot, fmt="",
             cmap="RdYlGn", center=0, vmin=-1, vmax=1,
             ax=ax, square=True, linewidths=0.5, annot_kws={"size": 8},
         )
@@ -260,14 +464,22 @@ def phase1_exploration(
         save_fig(fig, out / "1a_korrelation.png")
 
     # ── 1b) Boxplots für kategorische Parameter ─────────────
-    for feat in cat_features:
-        if df[feat].nunique() < 2:
-            continue
-        categories = df[feat].dropna().unique()
+    # Eine Figure für alle Boxplot-Seiten, Achsen werden pro Feature geleert
+    box_features = [f for f in cat_features if nunique[f] >= 2] if present_metrics else []
+    if box_features:
         n_metrics = len(present_metrics)
         fig, axes = plt.subplots(1, n_metrics, figsize=(4 * n_metrics, 4), squeeze=False)
+    for feat in box_features:
+        # Zeilen einmal nach Kategorie sortieren, Gruppen dann per Slice (NaN → Code -1)
+        codes, categories = pd.factorize(df[feat])
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(categories) + 1))
         for ax, metric in zip(axes[0], present_metrics):
-            data_groups = [df.loc[df[feat] == v, metric].dropna().tolist() for v in categories]
+            ax.cla()
+            vals = df[metric].to_numpy(dtype=float)[order]
+            data_groups = [
+                g[~np.isnan(g)] for g in (vals[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:]))
+            ]
             ax.boxplot(data_groups, labels=[str(v) for v in categories], patch_artist=True)
             ax.set_title(metric, fontsize=9)
             ax.set_xlabel(feat, fontsize=8)
@@ -276,28 +488,38 @@ def phase1_exploration(
         fig.suptitle(f"Einfluss von '{feat}' auf Retrieval-Metriken", fontsize=12, y=1.02)
         plt.tight_layout()
         safe = feat.replace("/", "_").replace("\\", "_")
-        save_fig(fig, out / f"1b_boxplot_{safe}.png")
+        save_fig(fig, out / f"1b_boxplot_{safe}.png", close=False)
+    if box_features:
+        plt.close(fig)
 
     # ── 1c) Scatterplots numerische Parameter vs. Zielmetrik ─
-    varying_num = [c for c in num_features if df[c].nunique() > 2]
+    varying_num = [c for c in num_features if nunique[c] > 2]
     if varying_num and len(df) >= 3:
         cols = min(3, len(varying_num))
         rows = (len(varying_num) + cols - 1) // cols
+        # Regressionsgeraden für alle Features in einem Schritt (Kleinste Quadrate)
+        x_df = df[varying_num]
+        x_all = x_df.fillna(x_df.median()).to_numpy(dtype=float)
+        y_all = df[target].fillna(0).to_numpy(dtype=float)
+        x_mean = x_all.mean(axis=0)
+        x_centered = x_all - x_mean
+        x_var = (x_centered ** 2).sum(axis=0)
+        cov = (x_centered * (y_all - y_all.mean())[:, None]).sum(axis=0)
+        slopes = np.divide(cov, x_var, out=np.zeros_like(cov), where=x_var > 0)
+        intercepts = y_all.mean() - slopes * x_mean
+
         fig, axes = plt.subplots(rows, cols, figsize=(5 * cols, 4 * rows), squeeze=False)
         for i, feat in enumerate(varying_num):
             ax = axes[i // cols][i % cols]
             sc = ax.scatter(
                 df[feat], df[target],
                 c=df[target], cmap="RdYlGn", vmin=0, vmax=1,
-                alpha=0.8, s=60, zorder=3,
+                alpha=0.8, s=60, zorder=3, rasterized=True,
             )
             plt.colorbar(sc, ax=ax, shrink=0.8)
-            x_vals = df[feat].fillna(df[feat].median())
-            y_vals = df[target].fillna(0)
-            if x_vals.std() > 0:
-                z = np.polyfit(x_vals, y_vals, 1)
-                xs = np.linspace(x_vals.min(), x_vals.max(), 100)
-                ax.plot(xs, np.poly1d(z)(xs), "r--", linewidth=1.5, alpha=0.6)
+            if x_var[i] > 0:
+                xs = np.linspace(x_all[:, i].min(), x_all[:, i].max(), 100)
+                ax.plot(xs, slopes[i] * xs + intercepts[i], "r--", linewidth=1.5, alpha=0.6)
             ax.set_xlabel(feat, fontsize=9)
             ax.set_ylabel(target, fontsize=9)
             ax.set_title(f"{feat} → {target}", fontsize=10)
@@ -320,7 +542,7 @@ def phase1_exploration(
         for i, metric in enumerate(show_metrics):
             ax.bar(x + i * width, df_s[metric], width, label=metric,
                    color=palette[i % 10], alpha=0.85)
-        labels = [_run_label(df_s.loc[j]) for j in range(len(df_s))]
+        labels = _run_labels(df_s)
         ax.set_xticks(x + width * (len(show_metrics) - 1) / 2)
         ax.set_xticklabels(labels, rotation=40, ha="right", fontsize=8)
         ax.set_ylim(0, 1.15)
@@ -344,7 +566,7 @@ def phase2_shap(
     target: str,
     out: Path,
     model_type: str = "rf",
-) -> tuple[Optional[Surrogate], Optional[pd.DataFrame]]:
+) -> tuple[Optional[Surrogate], Optional[pd.DataFrame], Optional[EncodingMap]]:
     label = "XGBoost" if model_type == "xgb" else "Random Forest"
     print_banner(f"Phase 2: SHAP + Dependence Plots ({label})")
 
@@ -352,12 +574,12 @@ def phase2_shap(
         print(f"  ⚠  Nur {len(df)} Läufe (Minimum empfohlen: {MIN_RUNS_FOR_ML}).")
         print("     SHAP-Ergebnisse mit wenigen Datenpunkten mit Vorsicht interpretieren.")
 
-    X = encode_features(df, feature_cols)
+    X, encoding_map = encode_features(df, feature_cols)
     y = df[target].fillna(0).values
 
     if X.empty or len(X) < 2 or X.shape[1] == 0:
         print("  ❌  Nicht genug Features/Zeilen für SHAP-Analyse.")
-        return None, None
+        return None, None, None
 
     model = _build_surrogate(model_type, len(df))
     model.fit(X, y)
@@ -365,13 +587,15 @@ def phase2_shap(
     # Cross-Validation
     if len(df) >= MIN_RUNS_FOR_ML:
         cv = min(3, len(df))
-        scores = cross_val_score(model, X, y, cv=cv, scoring="r2")
+        cv_model = clone(model).set_params(n_estimators=min(CV_MAX_ESTIMATORS, model.n_estimators))
+        scores = cross_val_score(cv_model, X, y, cv=cv, scoring="r2", n_jobs=-1)
         r2_info = f"R² = {scores.mean():.3f} ± {scores.std():.3f}"
         if scores.mean() < 0.3:
             r2_info += "  ⚠ niedrig (mehr Läufe erhöhen Aussagekraft)"
         print(f"  ℹ  Cross-Val {cv}-fold ({label}): {r2_info}")
 
-    explainer = shap.TreeExplainer(model)
+    # Pfadabhängig: nutzt die Knotengewichte der Bäume, kein Background-Sampling
+    explainer = shap.TreeExplainer(model, feature_perturbation="tree_path_dependent")
     shap_values = explainer.shap_values(X)  # (n_samples, n_features)
 
     # ── 2a) SHAP Summary (Beeswarm) ──────────────────────────
@@ -397,7 +621,7 @@ def phase2_shap(
     ax.set_xlabel("Mittlerer |SHAP-Wert|")
     ax.set_title(f"Parameter-Wichtigkeit (SHAP, {label}) für '{target}'")
     plt.tight_layout()
-    save_fig(fig, out / "2b_shap_importance.png")
+    save_fig(fig, out / "2b_shap_importance.png", dpi=REPORT_DPI)
 
     print(f"\n  📊  Parameter-Ranking (wichtigste zuerst, Ziel: '{target}'):")
     for _, row in imp_df.iloc[::-1].iterrows():
@@ -416,7 +640,7 @@ def phase2_shap(
         n_cols = len(top4)
         fig, axes = plt.subplots(1, n_cols, figsize=(5 * n_cols, 4), squeeze=False)
         for ax, feat in zip(axes[0], top4):
-            feat_idx = list(X.columns).index(feat)
+            feat_idx = X.columns.get_loc(feat)
             shap.dependence_plot(
                 feat_idx,
                 shap_values,
@@ -459,7 +683,10 @@ def phase2_shap(
             print(f"  ⚠  PDP fehlgeschlagen: {exc}")
 
     # ── 2e) SHAP Interaktionseffekte (ab 10 Läufen) ──────────
-    if len(df) >= 10 and X.shape[1] >= 2:
+    if X.shape[1] > MAX_FEATURES_FOR_INTERACTIONS:
+        print(f"  ℹ  Interaktions-Plot übersprungen ({X.shape[1]} Features > "
+              f"{MAX_FEATURES_FOR_INTERACTIONS}).")
+    elif len(df) >= 10 and X.shape[1] >= 2:
         try:
             shap_interact = explainer.shap_interaction_values(X)
             fig = plt.figure(figsize=(10, 8))
@@ -471,7 +698,7 @@ def phase2_shap(
             print(f"  ⚠  Interaktions-Plot fehlgeschlagen: {exc}")
 
     print("  ✓  Phase 2 abgeschlossen.")
-    return model, X
+    return model, X, encoding_map
 
 
 # ─────────────────────────────────────────────────────────────
@@ -504,39 +731,64 @@ def _add_past_trials(
     space: ParamSpec,
     target: str,
 ) -> int:
-    added = 0
-    for _, row in df.iterrows():
-        target_val = row.get(target)
-        if pd.isna(target_val):
-            continue
-        params: dict = {}
-        distributions: dict = {}
-        for col, spec in space.items():
-            raw = row.get(col)
-            kind = spec[0]
-            if kind == "categorical":
-                choices = spec[1]
-                val = str(raw) if not (isinstance(raw, float) and np.isnan(raw)) else choices[0]
-                val = val if val in choices else choices[0]
-                dist = CategoricalDistribution(choices=choices)
-            elif kind == "int":
-                lo, hi = spec[1], spec[2]
-                val = int(float(raw)) if not (isinstance(raw, float) and np.isnan(raw)) else (lo + hi) // 2
-                val = max(lo, min(hi, val))
-                dist = IntDistribution(low=lo, high=hi)
-            else:
-                lo, hi = spec[1], spec[2]
-                val = float(raw) if not (isinstance(raw, float) and np.isnan(raw)) else (lo + hi) / 2
-                val = max(lo, min(hi, val))
-                dist = FloatDistribution(low=lo, high=hi)
-            params[col] = val
-            distributions[col] = dist
+    df = df[df[target].notna()]
+    if df.empty:
+        return 0
+
+    # Werte spaltenweise aufbereiten: NaN → Mitte/erste Kategorie, auf Bereich clippen
+    values: dict[str, list] = {}
+    distributions: dict = {}
+    for col, spec in space.items():
+        series = df[col]
+        kind = spec[0]
+        if kind == "categorical":
+            choices = spec[1]
+            as_str = series.astype(str)
+            values[col] = as_str.where(series.notna() & as_str.isin(choices), choices[0]).tolist()
+            distributions[col] = CategoricalDistribution(choices=choices)
+        elif kind == "int":
+            lo, hi = spec[1], spec[2]
+            arr = np.trunc(np.nan_to_num(series.to_numpy(dtype=float), nan=(lo + hi) // 2))
+            values[col] = np.clip(arr, lo, hi).astype(int).tolist()
+            distributions[col] = IntDistribution(low=lo, high=hi)
+        else:
+            lo, hi = spec[1], spec[2]
+            arr = np.nan_to_num(series.to_numpy(dtype=float), nan=(lo + hi) / 2)
+            values[col] = np.clip(arr, lo, hi).tolist()
+            distributions[col] = FloatDistribution(low=lo, high=hi)
+
+    targets = df[target].to_numpy(dtype=float).tolist()
+    for i, target_val in enumerate(targets):
+        params = {col: vals[i] for col, vals in values.items()}
         trial = optuna.trial.create_trial(
-            params=params, distributions=distributions, value=float(target_val)
+            params=params, distributions=distributions, value=target_val
         )
         study.add_trial(trial)
-        added += 1
-    return added
+    return len(targets)
+
+
+def _sample_candidates(space: ParamSpec, n_samples: int) -> list[dict]:
+    """Kandidaten per Sobol-Folge gleichmäßig über den Parameterraum verteilen.
+
+    Das Ranking übernimmt das Surrogate-Modell, daher genügt eine
+    raumfüllende Stichprobe statt TPE-ask/tell.
+    """
+    sampler = qmc.Sobol(d=len(space), seed=RANDOM_STATE)
+    u = sampler.random_base2(m=max(1, math.ceil(math.log2(n_samples))))
+    columns: dict[str, list] = {}
+    for k, (col, spec) in enumerate(space.items()):
+        if spec[0] == "categorical":
+            choices = spec[1]
+            idx = np.minimum((u[:, k] * len(choices)).astype(int), len(choices) - 1)
+            columns[col] = [choices[i] for i in idx]
+        elif spec[0] == "int":
+            lo, hi = spec[1], spec[2]
+            vals = lo + np.floor(u[:, k] * (hi - lo + 1))
+            columns[col] = np.minimum(vals, hi).astype(int).tolist()
+        else:
+            lo, hi = spec[1], spec[2]
+            columns[col] = (lo + u[:, k] * (hi - lo)).tolist()
+    return [{col: vals[i] for col, vals in columns.items()} for i in range(len(u))]
 
 
 def _suggest_next(
@@ -544,35 +796,15 @@ def _suggest_next(
     space: ParamSpec,
     surrogate_model: Optional[Surrogate],
     X_train: Optional[pd.DataFrame],
+    encoding_map: Optional[EncodingMap],
     feature_cols: list[str],
     n: int,
     df_existing: pd.DataFrame,
 ) -> list[tuple[dict, float]]:
-    existing_keys = {
-        tuple(str(row.get(c, "")) for c in feature_cols)
-        for _, row in df_existing.iterrows()
-    }
-
-    # Kandidaten via Optuna-Sampler generieren
-    dummy_study = optuna.create_study(
-        direction="maximize",
-        sampler=optuna.samplers.TPESampler(seed=RANDOM_STATE),
-    )
-    for trial in study.trials:
-        dummy_study.add_trial(trial)
+    existing_keys = set(map(tuple, df_existing[feature_cols].astype(str).to_numpy().tolist()))
 
     candidates: list[dict] = []
-    for _ in range(n * 40):
-        trial = dummy_study.ask()
-        p: dict = {}
-        for col, spec in space.items():
-            if spec[0] == "categorical":
-                p[col] = trial.suggest_categorical(col, spec[1])
-            elif spec[0] == "int":
-                p[col] = trial.suggest_int(col, spec[1], spec[2])
-            else:
-                p[col] = trial.suggest_float(col, spec[1], spec[2])
-        dummy_study.tell(trial, 0.0)
+    for p in _sample_candidates(space, n * 40):
         key = tuple(str(p.get(c, "")) for c in feature_cols)
         if key not in existing_keys:
             candidates.append(p)
@@ -582,21 +814,29 @@ def _suggest_next(
         return []
 
     # RF/XGB-Scoring der Kandidaten
-    if surrogate_model is not None and X_train is not None:
-        scored: list[tuple[dict, float]] = []
-        for cand in candidates:
-            row_enc = {}
-            for col in X_train.columns:
-                for fc in feature_cols:
-                    prefix = f"{fc}_"
-                    if col.startswith(prefix):
-                        cat_val = col[len(prefix):]
-                        row_enc[col] = 1.0 if str(cand.get(fc, "")) == cat_val else 0.0
-                        break
-                else:
-                    row_enc[col] = float(cand.get(col, X_train[col].median()))
-            X_cand = pd.DataFrame([row_enc])[X_train.columns]
-            scored.append((cand, float(surrogate_model.predict(X_cand)[0])))
+    if surrogate_model is not None and X_train is not None and encoding_map is not None:
+        # Alle Kandidaten in eine Matrix kodieren und in einem Aufruf scoren:
+        # Kategorien per Lookup auf ihre One-Hot-Spalte, numerische Features
+        # direkt (fehlende Werte → Median der Trainingsdaten).
+        M = np.zeros((len(candidates), X_train.shape[1]), dtype=np.float32)
+        one_hot_cols: set[int] = set()
+        rows: list[int] = []
+        hot: list[int] = []
+        for fc, positions in encoding_map.items():
+            one_hot_cols.update(positions.values())
+            for i, cand in enumerate(candidates):
+                j = positions.get(str(cand.get(fc, "")))
+                if j is not None:
+                    rows.append(i)
+                    hot.append(j)
+        M[rows, hot] = 1.0
+        for j, col in enumerate(X_train.columns):
+            if j not in one_hot_cols:
+                median = X_train[col].median()
+                M[:, j] = [float(cand.get(col, median)) for cand in candidates]
+        # Ein Frame ohne Kopie um die Matrix – nur für die Feature-Namen des Modells
+        preds = surrogate_model.predict(pd.DataFrame(M, columns=X_train.columns, copy=False))
+        scored: list[tuple[dict, float]] = list(zip(candidates, preds.tolist()))
 
         scored.sort(key=lambda t: t[1], reverse=True)
         seen: set = set()
@@ -629,6 +869,7 @@ def phase3_optuna(
     n_suggestions: int,
     surrogate_model: Optional[Surrogate] = None,
     X_encoded: Optional[pd.DataFrame] = None,
+    encoding_map: Optional[EncodingMap] = None,
 ) -> None:
     print_banner("Phase 3: Optuna Surrogate-Modell")
 
@@ -672,7 +913,8 @@ def phase3_optuna(
         values = [t.value for t in study.trials if t.value is not None]
         running_max = np.maximum.accumulate(values)
         fig, ax = plt.subplots(figsize=(10, 4))
-        ax.scatter(range(len(values)), values, alpha=0.4, s=15, label="Trial-Wert", zorder=3)
+        ax.scatter(range(len(values)), values, alpha=0.4, s=15, label="Trial-Wert", zorder=3,
+                   rasterized=True)
         ax.plot(range(len(running_max)), running_max, "r-", linewidth=2, label="Bestes Ergebnis")
         ax.axvline(added - 1, color="steelblue", linestyle="--", alpha=0.6,
                    label=f"Echte Daten ({added} Läufe)")
@@ -686,7 +928,9 @@ def phase3_optuna(
         print(f"  ⚠  History-Plot fehlgeschlagen: {exc}")
 
     # ── Empfehlungen ─────────────────────────────────────────
-    suggestions = _suggest_next(study, space, surrogate_model, X_encoded, feature_cols, n_suggestions, df)
+    suggestions = _suggest_next(
+        study, space, surrogate_model, X_encoded, encoding_map, feature_cols, n_suggestions, df,
+    )
     if not suggestions:
         print("  ⚠  Keine Empfehlungen generierbar.")
         return
@@ -719,17 +963,10 @@ def phase4_dowhy(
     target: str,
     out: Path,
     treatment_col: Optional[str] = None,
+    refute: bool = False,
 ) -> None:
     print_banner("Phase 4: DoWhy – Kausale Analyse")
 
-    try:
-        import dowhy
-        from dowhy import CausalModel
-    except ImportError:
-        print("  ❌  dowhy nicht installiert.")
-        print("     pip install dowhy")
-        return
-
     if len(df) < 6:
         print(f"  ⚠  Nur {len(df)} Läufe – kausale Analyse erfordert mindestens 6.")
         return
@@ -779,10 +1016,10 @@ def phase4_dowhy(
 
         # Priorität 3: Numerisch – höchste Varianz
         if treatment_col is None:
-            num_varying = sorted(
-                [c for c in feature_cols
-                 if pd.api.types.is_numeric_dtype(df[c]) and df[c].nunique() > 1],
-                key=lambda c: df[c].std(), reverse=True,
+            num_cols = [c for c in feature_cols if pd.api.types.is_numeric_dtype(df[c])]
+            stds = df[num_cols].std()
+            num_varying = (
+                stds[stds > 0].sort_values(ascending=False, kind="stable").index.tolist()
             )
             if not num_varying:
                 print("  ❌  Kein geeignetes Treatment-Feature gefunden.")
@@ -815,7 +1052,21 @@ def phase4_dowhy(
             df_dw[treatment_col] = df_dw[treatment_col].map({v: i for i, v in enumerate(uniq)})
             print(f"  ℹ  Kategorisches Treatment ordinalkodiert: {dict(enumerate(uniq))}")
 
-    df_dw = df_dw.fillna(df_dw.median(numeric_only=True))
+    # Fehlende numerische Werte mit dem Spalten-Median füllen (ein nanmedian-Aufruf,
+    # nur Spalten mit NaN werden neu geschrieben, Dtypes bleiben erhalten)
+    num_cols = df_dw.select_dtypes(include=np.number).columns
+    arr = df_dw[num_cols].to_numpy(dtype=np.float64)
+    nan_mask = np.isnan(arr)
+    nan_cols = np.flatnonzero(nan_mask.any(axis=0))
+    if nan_cols.size:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # All-NaN-Spalten bleiben NaN
+            medians = np.nanmedian(arr[:, nan_cols], axis=0)
+        for j, med in zip(nan_cols, medians):
+            col = num_cols[j]
+            filled = arr[:, j].copy()
+            filled[nan_mask[:, j]] = med
+            df_dw[col] = filled.astype(df_dw[col].dtype, copy=False)
     common_causes = [c for c in feature_cols if c != treatment_col]
 
     print(f"\n  ℹ  Treatment  : {treatment_display}")
@@ -824,50 +1075,64 @@ def phase4_dowhy(
 
     # Annahme: alle anderen Parameter sind Confounder (unabhängig gesetzt).
     # common_causes statt graph= vermeidet networkx-Versionskonflikte.
-    try:
-        causal_model = CausalModel(
-            data=df_dw,
-            treatment=treatment_col,
-            outcome=target,
-            common_causes=common_causes if common_causes else None,
-        )
-    except Exception as exc:
-        print(f"  ❌  CausalModel-Erstellung fehlgeschlagen: {exc}")
-        return
+    # Das CausalModel wird nur für die (optionale) Refutation gebraucht.
+    # ATE und Counterfactuals brauchen nur numpy/scipy; dowhy nur für --refute.
+    causal_model = None
+    dowhy_missing = False
+    if refute:
+        try:
+            from dowhy import CausalModel
+        except ImportError:
+            dowhy_missing = True
+        else:
+            try:
+                causal_model = CausalModel(
+                    data=df_dw,
+                    treatment=treatment_col,
+                    outcome=target,
+                    common_causes=common_causes if common_causes else None,
+                )
+            except Exception as exc:
+                print(f"  ❌  CausalModel-Erstellung fehlgeschlagen: {exc}")
+                return
 
-    # ── ATE (Average Treatment Effect) via LinearRegression ──
+    # ── ATE (Average Treatment Effect) via OLS-Regression ────
     #
     # Backdoor-Adjustment: Regressiere Outcome auf Treatment + alle Confounders.
     # Der Koeffizient des Treatments ist der ATE (unter Linearitätsannahme).
     # Robust gegenüber networkx-Versionskonflikten in DoWhy's identify_effect().
     #
     print("\n  Schätze Average Treatment Effect (ATE)...")
-    from sklearn.linear_model import LinearRegression
-    from scipy import stats as scipy_stats
 
     ate: float = 0.0
+    beta: Optional[np.ndarray] = None
     estimate = None
     identified_estimand = None
 
     try:
-        X_ate = df_dw[feature_cols].copy().astype(float)
-        y_ate = df_dw[target].values
-
-        lr_ate = LinearRegression()
-        lr_ate.fit(X_ate, y_ate)
-
-        t_idx = list(X_ate.columns).index(treatment_col)
-        ate = float(lr_ate.coef_[t_idx])
-
-        # p-Wert via t-Test (OLS-Approximation)
-        y_pred = lr_ate.predict(X_ate)
-        residuals = y_ate - y_pred
-        n, k = len(y_ate), X_ate.shape[1]
-        mse = np.dot(residuals, residuals) / max(n - k - 1, 1)
+        y_ate = df_dw[target].to_numpy(dtype=np.float64)
+        n, k = len(df_dw), len(feature_cols)
+
+        # Designmatrix [1 | Features] einmal spaltenweise befüllen; sie dient ATE
+        # und Counterfactuals. Fortran-Order spart die Kopie in LAPACKs gelsd.
+        X_design = np.empty((n, k + 1), dtype=np.float64, order="F")
+        X_design[:, 0] = 1.0
+        for j, col in enumerate(feature_cols, start=1):
+            X_design[:, j] = df_dw[col].to_numpy(dtype=np.float64)
+
+        # OLS mit Intercept in einem lstsq-Aufruf; Koeffizient des Treatments = ATE
+        beta = np.linalg.lstsq(X_design, y_ate, rcond=None)[0]
+        t_idx = feature_cols.index(treatment_col) + 1
+        ate = float(beta[t_idx])
+
+        # p-Wert via t-Test (OLS-Approximation), Kovarianz per Cholesky
+        residuals = y_ate - X_design @ beta
+        mse = residuals @ residuals / max(n - k - 1, 1)
         try:
-            X_np = X_ate.values
-            cov = mse * np.linalg.inv(X_np.T @ X_np)
-            se = float(np.sqrt(np.diag(cov)[t_idx]))
+            xtx_inv = scipy_linalg.cho_solve(
+                scipy_linalg.cho_factor(X_design.T @ X_design), np.eye(k + 1)
+            )
+            se = float(np.sqrt(mse * xtx_inv[t_idx, t_idx]))
             t_stat = ate / se if se > 0 else 0.0
             p_val = float(2 * scipy_stats.t.sf(abs(t_stat), df=n - k - 1))
         except np.linalg.LinAlgError:
@@ -884,18 +1149,20 @@ def phase4_dowhy(
         sig_label = "✓ signifikant" if p_val < 0.05 else "⚠ nicht signifikant"
         print(f"      p-Wert: {p_val:.4f}  {sig_label}  (OLS-Approximation, n={n})")
 
-        # DoWhy: Refutation versuchen (optional, kann bei networkx-Konflikten fehlschlagen)
-        try:
-            identified_estimand = causal_model.identify_effect(
-                proceed_when_unidentifiable=True
-            )
-            estimate = causal_model.estimate_effect(
-                identified_estimand,
-                method_name="backdoor.linear_regression",
-                test_significance=False,
-            )
-        except Exception:
-            pass  # Refutation wird weiter unten sauber behandelt
+        # DoWhy: Refutation versuchen (nur mit --refute, kann bei networkx-Konflikten
+        # fehlschlagen). backdoor.linear_regression ist dieselbe OLS wie oben.
+        if causal_model is not None:
+            try:
+                identified_estimand = causal_model.identify_effect(
+                    proceed_when_unidentifiable=True
+                )
+                estimate = causal_model.estimate_effect(
+                    identified_estimand,
+                    method_name="backdoor.linear_regression",
+                    test_significance=False,
+                )
+            except Exception:
+                pass  # Refutation wird weiter unten sauber behandelt
 
     except Exception as exc:
         print(f"  ⚠  ATE-Schätzung fehlgeschlagen: {exc}")
@@ -916,9 +1183,16 @@ def phase4_dowhy(
                 )
                 new_effect = getattr(ref, "new_effect", None)
                 status = "✓" if new_effect is not None and abs(new_effect - ate) < abs(ate) * 0.5 else "⚠"
-                print(f"    {status} {label:30s}: neuer Effekt = {new_effect:.4f if new_effect is not None else 'n/a'}")
+                effect_str = f"{new_effect:.4f}" if new_effect is not None else "n/a"
+                print(f"    {status} {label:30s}: neuer Effekt = {effect_str}")
             except Exception as exc:
                 print(f"    ⚠  {label}: {exc}")
+    elif not refute:
+        print("\n  ℹ  DoWhy-Refutation nicht aktiviert (--refute)."
+              "\n     ATE via OLS-Backdoor-Regression berechnet (gleichwertig).")
+    elif dowhy_missing:
+        print("\n  ⚠  dowhy nicht installiert – Refutation übersprungen (pip install dowhy)."
+              "\n     ATE via OLS-Backdoor-Regression berechnet (gleichwertig).")
     else:
         print("\n  ℹ  DoWhy-Refutation übersprungen (networkx-Inkompatibilität)."
               "\n     ATE via OLS-Backdoor-Regression berechnet (gleichwertig).")
@@ -929,39 +1203,33 @@ def phase4_dowhy(
     #
     print("\n  Berechne Counterfactuals (was wäre wenn?)...")
     try:
-        # Konservativ: lineares Modell für Counterfactuals
-        from sklearn.linear_model import LinearRegression
-
-        X_cf = df_dw[feature_cols].copy()
-        y_cf = df_dw[target].values
-
-        lr = LinearRegression()
-        lr.fit(X_cf, y_cf)
+        # Konservativ: dasselbe lineare Modell wie für den ATE (gleiche Features/Target)
+        if beta is None:
+            raise ValueError("kein OLS-Fit aus der ATE-Schätzung vorhanden")
+        treatment_coef = beta[t_idx]
 
-        treatment_idx = list(X_cf.columns).index(treatment_col)
-        treatment_coef = lr.coef_[treatment_idx]
-
-        # Für die ersten min(5, n) Läufe Counterfactual berechnen
+        # Für die ersten min(5, n) Läufe Counterfactual berechnen (Treatment-Flip 0↔1)
         n_cf = min(5, len(df_dw))
-        cf_rows = []
-        for i in range(n_cf):
-            row = df_dw.iloc[i]
-            actual_treatment = row[treatment_col]
-            counterfactual_treatment = 1 - int(actual_treatment)  # flip binary
-            actual_score = float(lr.predict(X_cf.iloc[[i]])[0])
-            cf_score = actual_score + treatment_coef * (counterfactual_treatment - actual_treatment)
-            cf_rows.append({
-                "run": _run_label(df.iloc[i]),
-                f"{treatment_col}_actual": actual_treatment,
-                f"{treatment_col}_counterfactual": counterfactual_treatment,
-                f"{target}_actual": round(actual_score, 4),
-                f"{target}_counterfactual": round(cf_score, 4),
-                "delta": round(cf_score - actual_score, 4),
-            })
-
-        cf_df = pd.DataFrame(cf_rows)
+        X_np = X_design[:n_cf]
+        actual_scores = X_np @ beta
+        actual_treatment = X_np[:, t_idx]
+        counterfactual_treatment = 1 - actual_treatment.astype(int)
+        cf_scores = actual_scores + treatment_coef * (counterfactual_treatment - actual_treatment)
+
+        cf_df = pd.DataFrame({
+            "run": _run_labels(df, n_cf),
+            f"{treatment_col}_actual": actual_treatment,
+            f"{treatment_col}_counterfactual": counterfactual_treatment,
+            f"{target}_actual": actual_scores.round(4),
+            f"{target}_counterfactual": cf_scores.round(4),
+            "delta": (cf_scores - actual_scores).round(4),
+        })
+        # Fünf Zeilen: direkt per csv-Modul schreiben statt über pandas' CSV-Writer
         cf_path = out / "4_counterfactuals.csv"
-        cf_df.to_csv(cf_path, index=False)
+        with open(cf_path, "w", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh, lineterminator="\n")
+            writer.writerow(cf_df.columns)
+            writer.writerows(zip(*(cf_df[c].tolist() for c in cf_df.columns)))
 
         print(f"\n  Counterfactual-Tabelle (Treatment: '{treatment_display}', flip 0↔1):")
         print(cf_df.to_string(index=False))
@@ -974,11 +1242,12 @@ def phase4_dowhy(
         fig, axes = plt.subplots(1, 2, figsize=(12, 4))
 
         # Linke Seite: Boxplot Score nach Treatment-Wert
-        groups = [
-            df_dw.loc[df_dw[treatment_col] == v, target].dropna()
-            for v in sorted(df_dw[treatment_col].unique())
-        ]
-        labels = [f"Treatment={v}" for v in sorted(df_dw[treatment_col].unique())]
+        # Ein groupby-Split statt einer Boolean-Maske pro Treatment-Wert
+        by_treatment = df_dw.groupby(treatment_col, observed=True, sort=True)[target]
+        groups, labels = [], []
+        for v, grp in by_treatment:
+            groups.append(grp.dropna().to_numpy())
+            labels.append(f"Treatment={v}")
         axes[0].boxplot(groups, labels=labels, patch_artist=True)
         axes[0].set_ylabel(target)
         axes[0].set_title(f"Score-Verteilung nach Treatment\n'{treatment_display}'")
@@ -1000,7 +1269,7 @@ def phase4_dowhy(
 
         plt.suptitle(f"DoWhy Kausale Analyse: '{treatment_display}' → '{target}'", fontsize=12)
         plt.tight_layout()
-        save_fig(fig, out / "4a_dowhy_ate.png")
+        save_fig(fig, out / "4a_dowhy_ate.png", dpi=REPORT_DPI)
     except Exception as exc:
         print(f"  ⚠  ATE-Plot fehlgeschlagen: {exc}")
 
@@ -1067,10 +1336,18 @@ def main() -> None:
         "--treatment", type=str, default=None,
         help="Phase 4: Treatment-Feature für kausale Analyse (default: auto)",
     )
+    parser.add_argument(
+        "--refute", action="store_true",
+        help="Phase 4: DoWhy-Refutation-Tests ausführen (langsam, default: aus)",
+    )
     parser.add_argument(
         "--phase", type=int, choices=[1, 2, 3, 4],
         help="Nur eine bestimmte Phase ausführen (default: alle)",
     )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Reports immer neu einlesen, Parquet-Cache im Ausgabeverzeichnis ignorieren",
+    )
     args = parser.parse_args()
 
     args.output.mkdir(parents=True, exist_ok=True)
@@ -1081,7 +1358,7 @@ def main() -> None:
     files = find_report_files(args.reports)
     if not files:
         sys.exit(1)
-    df = build_dataframe(files)
+    df = build_dataframe(files, cache_dir=None if args.no_cache else args.output)
     feature_cols = get_feature_cols(df)
 
     if not feature_cols:
@@ -1097,6 +1374,7 @@ def main() -> None:
     run_all = args.phase is None
     surrogate: Optional[Surrogate] = None
     X_encoded: Optional[pd.DataFrame] = None
+    encoding_map: Optional[EncodingMap] = None
 
     if run_all or args.phase == 1:
         phase1_exploration(df, feature_cols, args.target, args.output)
@@ -1104,18 +1382,18 @@ def main() -> None:
     if run_all or args.phase == 2:
         result = phase2_shap(df, feature_cols, args.target, args.output, args.model)
         if result:
-            surrogate, X_encoded = result
+            surrogate, X_encoded, encoding_map = result
 
     if run_all or args.phase == 3:
         phase3_optuna(
             df, feature_cols, args.target, args.output,
-            args.suggestions, surrogate, X_encoded,
+            args.suggestions, surrogate, X_encoded, encoding_map,
         )
 
     if run_all or args.phase == 4:
         phase4_dowhy(
             df, feature_cols, args.target, args.output,
-            treatment_col=args.treatment,
+            treatment_col=args.treatment, refute=args.refute,
         )
 
     print(f"\n✅  Analyse abgeschlossen. Alle Ergebnisse in: {args.output.resolve()}")
@@ -16,22 +16,31 @@ Usage:
     python recompute_llm_metrics.py --run-group 20260227_164245_run
     python recompute_llm_metrics.py --run-group 20260227_164245_run --dry-run
     python recompute_llm_metrics.py --reports /path/to/reports --run-group myrun
+    python recompute_llm_metrics.py --run-group 20260227_164245_run --jobs 8
 """
 
 import argparse
 import json
 import math
+import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional: faster JSON (de)serialization, else stdlib json
+    orjson = None
+
 # Mirrors REFERENCE_PATTERN in LightRagClient.java
 REFERENCE_PATTERN = re.compile(r'^[-*]?\s*\[(\d+)]\s*(.+?)\s*$', re.MULTILINE)
 
 
 def parse_referenced_files(text: str) -> list[str]:
     """Mirrors LightRagClient.parseReferencedFiles() with the annotation fix."""
-    if not text:
+    if not text or "[" not in text:
         return []
     files = []
     for m in REFERENCE_PATTERN.finditer(text):
@@ -44,27 +53,26 @@ def parse_referenced_files(text: str) -> list[str]:
         if ref:
             files.append(ref)
     # distinct, preserve order
-    seen = set()
-    result = []
-    for f in files:
-        if f not in seen:
-            seen.add(f)
-            result.append(f)
-    return result
-
-
-def matches(retrieved: str, expected: str) -> bool:
-    """Mirrors: ret.equalsIgnoreCase(exp) || ret.toLowerCase().contains(exp.toLowerCase())"""
-    r, e = retrieved.lower(), expected.lower()
-    return r == e or e in r
+    return list(dict.fromkeys(files))
 
 
 def compute_run_metrics(retrieved: list[str], expected: list[str]) -> dict:
-    """Mirrors LlmRunResult.of() metric calculation."""
+    """Mirrors LlmRunResult.of() metric calculation.
+
+    A retrieved doc matches an expected one as in
+    ret.equalsIgnoreCase(exp) || ret.toLowerCase().contains(exp.toLowerCase())
+    """
     if not expected:
         return dict(recall=0.0, precision=0.0, f1=0.0, hit=False, mrr=0.0)
 
-    hits = sum(1 for exp in expected if any(matches(ret, exp) for ret in retrieved))
+    # Lowercase once per run instead of twice per comparison; exact matches
+    # are a set lookup, the substring scan only runs when that fails
+    exp_lower = [e.lower() for e in expected]
+    ret_lower = [r.lower() for r in retrieved]
+    ret_set = set(ret_lower)
+    exp_set = set(exp_lower)
+
+    hits = sum(1 for e in exp_lower if e in ret_set or any(e in r for r in ret_lower))
 
     recall    = hits / len(expected)
     precision = hits / len(retrieved) if retrieved else 0.0
@@ -73,8 +81,8 @@ def compute_run_metrics(retrieved: list[str], expected: list[str]) -> dict:
 
     # MRR: reciprocal rank of first retrieved doc that matches any expected doc
     mrr = 0.0
-    for i, ret in enumerate(retrieved):
-        if any(matches(ret, exp) for exp in expected):
+    for i, r in enumerate(ret_lower):
+        if r in exp_set or any(e in r for e in exp_lower):
             mrr = 1.0 / (i + 1)
             break
 
@@ -85,50 +93,58 @@ def _mean(values: list[float]) -> float:
     return sum(values) / len(values) if values else 0.0
 
 
-def _std_dev(values: list[float]) -> float:
-    """Population std dev (÷ N), mirrors AggregatedLlmMetrics.java."""
-    if len(values) < 2:
-        return 0.0
-    m = _mean(values)
-    return math.sqrt(sum((v - m) ** 2 for v in values) / len(values))
+def _mean_std(values: tuple[float, ...]) -> tuple[float, float]:
+    """Mean and population std dev (÷ N), mirrors AggregatedLlmMetrics.java.
+
+    Computes the mean once and reuses it for the deviation sum.
+    """
+    n = len(values)
+    if n == 0:
+        return 0.0, 0.0
+    m = sum(values) / n
+    if n < 2:
+        return m, 0.0
+    return m, math.sqrt(sum((v - m) ** 2 for v in values) / n)
 
 
 def recompute_result_llm(result: dict) -> dict:
-    """Re-derives retrievedDocuments and all LLM metrics for one result entry."""
+    """Re-derives retrievedDocuments and all LLM metrics for one result entry.
+
+    Updates the run dicts in place; returns the updated llm block.
+    """
     expected = result.get("expectedDocuments", [])
     llm = result.get("llm", {})
 
-    new_runs = []
-    for run in llm.get("runs", []):
+    new_runs = llm.get("runs", [])
+    rows = []
+    for run in new_runs:
         response_text = run.get("responseText", "")
         new_retrieved = parse_referenced_files(response_text)
         m = compute_run_metrics(new_retrieved, expected)
-        new_run = {**run,
-                   "retrievedDocuments": new_retrieved,
-                   "recall":    round(m["recall"],    6),
-                   "precision": round(m["precision"], 6),
-                   "f1":        round(m["f1"],        6),
-                   "hit":       m["hit"],
-                   "mrr":       round(m["mrr"],       6)}
-        new_runs.append(new_run)
-
-    recalls    = [r["recall"]    for r in new_runs]
-    precisions = [r["precision"] for r in new_runs]
-    f1s        = [r["f1"]        for r in new_runs]
-    hits       = [1.0 if r["hit"] else 0.0 for r in new_runs]
-    mrrs       = [r["mrr"]       for r in new_runs]
-
-    return {**llm,
-            "runs":         new_runs,
-            "avgRecall":    round(_mean(recalls),    6),
-            "stdDevRecall": round(_std_dev(recalls), 6),
-            "avgPrecision": round(_mean(precisions),    6),
-            "stdDevPrecision": round(_std_dev(precisions), 6),
-            "avgF1":        round(_mean(f1s),    6),
-            "stdDevF1":     round(_std_dev(f1s), 6),
-            "hitRate":      round(_mean(hits),   6),
-            "avgMrr":       round(_mean(mrrs),    6),
-            "stdDevMrr":    round(_std_dev(mrrs), 6)}
+        run["retrievedDocuments"] = new_retrieved
+        run["recall"]    = round(m["recall"],    6)
+        run["precision"] = round(m["precision"], 6)
+        run["f1"]        = round(m["f1"],        6)
+        run["hit"]       = m["hit"]
+        run["mrr"]       = round(m["mrr"],       6)
+        rows.append((run["recall"], run["precision"], run["f1"],
+                     1.0 if run["hit"] else 0.0, run["mrr"]))
+
+    # (mean, std) per metric column: recall, precision, f1, hit, mrr
+    columns = list(zip(*rows)) if rows else [()] * 5
+    recall, precision, f1, hit, mrr = map(_mean_std, columns)
+
+    llm.update({"runs":         new_runs,
+                "avgRecall":    round(recall[0],    6),
+                "stdDevRecall": round(recall[1],    6),
+                "avgPrecision": round(precision[0], 6),
+                "stdDevPrecision": round(precision[1], 6),
+                "avgF1":        round(f1[0],        6),
+                "stdDevF1":     round(f1[1],        6),
+                "hitRate":      round(hit[0],       6),
+                "avgMrr":       round(mrr[0],       6),
+                "stdDevMrr":    round(mrr[1],       6)})
+    return llm
 
 
 def recompute_summary_llm(results: list[dict], old_summary_llm: dict) -> dict:
@@ -143,45 +159,58 @@ def recompute_summary_llm(results: list[dict], old_summary_llm: dict) -> dict:
 
 
 def find_report_files(base: Path) -> list[Path]:
+    # scandir's DirEntry answers is_dir() from the directory listing, so only
+    # the candidate JSON needs its own stat()
+    with os.scandir(base) as it:
+        subdirs = sorted((e for e in it if e.is_dir()), key=lambda e: e.name)
     files = []
-    for subdir in sorted(base.iterdir()):
-        if subdir.is_dir():
-            candidate = subdir / (subdir.name + ".json")
-            if candidate.is_file():
-                files.append(candidate)
+    for entry in subdirs:
+        candidate = Path(entry.path) / (entry.name + ".json")
+        if candidate.is_file():
+            files.append(candidate)
     return files
 
 
-def process(path: Path, dry_run: bool) -> tuple[float, float, int]:
-    with open(path, encoding="utf-8") as f:
-        data = json.load(f)
+def _load_report(path: Path) -> dict:
+    with open(path, "rb") as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw.decode("utf-8"))
 
+
+def _dump_report(data: dict) -> bytes:
+    """Pretty-printed UTF-8 JSON, 2-space indent (same layout as json.dump(indent=2))."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def process(path: Path, dry_run: bool) -> tuple[str, float, float, int]:
+    """Recomputes one report file; returns (label, old F1, new F1, changed runs)."""
+    data = _load_report(path)
+
+    label = data.get("configuration", {}).get("runLabel", path.stem)
     old_f1 = data.get("summary", {}).get("llm", {}).get("avgF1", 0.0)
 
-    new_results = []
+    results = data.setdefault("results", [])
     changed_runs = 0
-    for result in data.get("results", []):
+    for result in results:
         if "llm" not in result:
-            new_results.append(result)
             continue
+        # Only retrievedDocuments is needed from before the in-place update
+        old_retrieved = [run.get("retrievedDocuments") for run in result["llm"].get("runs", [])]
         new_llm = recompute_result_llm(result)
-        # Count runs where retrievedDocuments changed
-        for old_run, new_run in zip(result["llm"].get("runs", []), new_llm["runs"]):
-            if old_run.get("retrievedDocuments") != new_run["retrievedDocuments"]:
+        for old_ret, new_run in zip(old_retrieved, new_llm["runs"]):
+            if old_ret != new_run["retrievedDocuments"]:
                 changed_runs += 1
-        new_results.append({**result, "llm": new_llm})
-
-    data["results"] = new_results
 
     old_summary_llm = data.get("summary", {}).get("llm", {})
-    data.setdefault("summary", {})["llm"] = recompute_summary_llm(new_results, old_summary_llm)
+    data.setdefault("summary", {})["llm"] = recompute_summary_llm(results, old_summary_llm)
     new_f1 = data["summary"]["llm"]["avgF1"]
 
     if not dry_run:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        path.write_bytes(_dump_report(data))
 
-    return old_f1, new_f1, changed_runs
+    return label, old_f1, new_f1, changed_runs
 
 
 def main():
@@ -193,6 +222,9 @@ def main():
                         help="Subdirectory within reports (run group folder name)")
     parser.add_argument("--dry-run",   action="store_true",
                         help="Show what would change without writing files")
+    parser.add_argument("--jobs",      type=int, default=1,
+                        help="Worker processes for recomputing files in parallel "
+                             "(default: 1)")
     args = parser.parse_args()
 
     base = Path(args.reports)
@@ -213,11 +245,17 @@ def main():
     print(f"{'Label':<50} {'Old F1':>8} {'New F1':>8}  {'Δ':>8}  {'Runs':>6}")
     print("-" * 85)
 
+    # Files are independent: recompute them in parallel, print in input order
+    worker = partial(process, dry_run=args.dry_run)
+    jobs = max(1, min(args.jobs, len(files)))
+    if jobs == 1:
+        results = list(map(worker, files))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(worker, files))
+
     total_changed = 0
-    for path in files:
-        with open(path, encoding="utf-8") as f:
-            label = json.load(f).get("configuration", {}).get("runLabel", path.stem)
-        old_f1, new_f1, changed = process(path, args.dry_run)
+    for label, old_f1, new_f1, changed in results:
         total_changed += changed
         delta = new_f1 - old_f1
         marker = " ✓" if delta > 0.0001 else ""